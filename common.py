@@ -1,8 +1,10 @@
 from typing import TypeAlias
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
 from dataclasses import dataclass
-import json
-from jsonschema import validate
+import orjson
+from jsonschema.validators import validator_for
 
 
 Cell = tuple[int, int]  # (row, col)
@@ -43,7 +45,7 @@ PUZZLE_JSON_SCHEMA = {
                 "properties": {
                     "x": {"type": "integer"},
                     "y": {"type": "integer"},
-                    "value": {"type": "integer"},
+                    "value": {"type": "integer", "minimum": 1, "maximum": 9},
                 },
                 "required": ["x", "y", "value"],
             },
@@ -52,69 +54,69 @@ PUZZLE_JSON_SCHEMA = {
     "required": ["size", "cells"],
 }
 
+# Build the validator once, jsonschema.validate re-checks the schema on every call
+_PUZZLE_VALIDATOR_CLASS = validator_for(PUZZLE_JSON_SCHEMA)
+_PUZZLE_VALIDATOR_CLASS.check_schema(PUZZLE_JSON_SCHEMA)
+_PUZZLE_VALIDATOR = _PUZZLE_VALIDATOR_CLASS(PUZZLE_JSON_SCHEMA)
+
+
+def validate_puzzle(puzzle: dict) -> None:
+    """Raise jsonschema.ValidationError if puzzle doesn't match PUZZLE_JSON_SCHEMA."""
+    _PUZZLE_VALIDATOR.validate(puzzle)
+
 
 def load_puzzle_data(file_path: str | Path) -> dict:
-    """Load and validate puzzle data from JSON file."""
-    with open(file_path) as f:
+    """Load and validate puzzle data from JSON file.
+
+    Loads are cached until the file changes, so the returned dict is shared
+    between callers and must not be mutated.
+    """
+    file_path = Path(file_path)
+    return _load_puzzle_data(file_path, file_path.stat().st_mtime_ns)
+
+
+@lru_cache(maxsize=256)
+def _load_puzzle_data(file_path: Path, mtime_ns: int) -> dict:
+    with open(file_path, "rb") as f:
         try:
-            data = json.load(f)
-        except json.JSONDecodeError as e:
+            data = orjson.loads(f.read())
+        except orjson.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON in {file_path}: {e}")
-    validate(instance=data, schema=PUZZLE_JSON_SCHEMA)
+    validate_puzzle(data)
     return data
 
 
-def pretty_json_str(puzzle: dict) -> str:
-    """Returns json_str for puzzle dict that looks good"""
-    validate(instance=puzzle, schema=PUZZLE_JSON_SCHEMA)
-    has_solution = "solution_cells" in puzzle
+_cell_position = itemgetter("x", "y")
 
-    puzzle["cells"].sort(key=lambda cell: (cell["x"], cell["y"]))
-    if has_solution:
-        puzzle["solution_cells"].sort(key=lambda cell: (cell["x"], cell["y"]))
 
-    size_str = f'[{puzzle["size"][0]}, {puzzle["size"][1]}]'
-
-    # Format each cell object on one line with proper spacing
-    cells_str = []
-    for cell in puzzle["cells"]:
+def _cells_json_str(cells: list[dict]) -> str:
+    """Format each cell object on one line with proper spacing"""
+    cell_strs = []
+    for cell in cells:
         parts = []
         for key, value in cell.items():
             if isinstance(value, bool):
                 parts.append(f'"{key}": {str(value).lower()}')
             else:
                 parts.append(f'"{key}": {value}')
-        cell_str = "{ " + ", ".join(parts) + " }"
-        cells_str.append("    " + cell_str)
-
-    if has_solution:
-        solution_cells_str = []
-        for cell in puzzle["solution_cells"]:
-            parts = []
-            for key, value in cell.items():
-                parts.append(f'"{key}": {value}')
-            solution_cell_str = "{ " + ", ".join(parts) + " }"
-            solution_cells_str.append("    " + solution_cell_str)
-
-    # Build final JSON string with exact formatting
-    json_str = "{\n"
-    json_str += f'  "size": {size_str},\n'
-    json_str += '  "cells": [\n'
-    json_str += ",\n".join(cells_str)
-    json_str += "\n  ]"
-    if has_solution:
-        json_str += ",\n"
-        json_str += '  "solution_cells": [\n'
-        json_str += ",\n".join(solution_cells_str)
-        json_str += "\n  ]"
-    json_str += "\n}"
-
-    # Make sure that final json is valid
-    validate(json.loads(json_str), PUZZLE_JSON_SCHEMA)
-    return json_str
-
-
-@dataclass
+        cell_strs.append("    { " + ", ".join(parts) + " }")
+    return "[\n" + ",\n".join(cell_strs) + "\n  ]"
+
+
+def pretty_json_str(puzzle: dict) -> str:
+    """Returns json_str for puzzle dict that looks good"""
+    validate_puzzle(puzzle)
+
+    sections = [f'  "size": [{puzzle["size"][0]}, {puzzle["size"][1]}]']
+    for key in ("cells", "solution_cells"):
+        if key in puzzle:
+            cells = sorted(puzzle[key], key=_cell_position)
+            sections.append(f'  "{key}": {_cells_json_str(cells)}')
+
+    return "{\n" + ",\n".join(sections) + "\n}"
+
+
+@dataclass(slots=True, frozen=True)
 class SolutionCell:
     x: int
     y: int
@@ -124,7 +126,7 @@ class SolutionCell:
 Solution: TypeAlias = list[SolutionCell]
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ClueCell:
     x: int
     y: int
@@ -133,27 +135,84 @@ class ClueCell:
     is_wall: bool
 
 
+@dataclass(slots=True, frozen=True)
+class SumRun:
+    total: int
+    cells: list[Cell]
+
+
 class KakuroPuzzle:
     def __init__(self, size: PuzzleSize, cells: list[dict]):
         """Initialize puzzle with validated data."""
         self.size = size
-        self.board: dict[Cell, ClueCell] = {}
+        rows, cols = size
+        # Indexed as grid[col][row] like the solver grid, None for blank cells
+        self.grid: list[list[ClueCell | None]] = [[None] * rows for _ in range(cols)]
         for cell in cells:
             x, y = cell["x"], cell["y"]
+            if not (0 <= x < cols and 0 <= y < rows):
+                raise ValueError(f"Cell ({x}, {y}) is outside puzzle of size {size}")
             row_sum = cell.get("right")
             col_sum = cell.get("down")
             # Support writing wall explicit or implicit
-            is_wall = cell.get("wall") or row_sum or col_sum
+            is_wall = (
+                bool(cell.get("wall")) or row_sum is not None or col_sum is not None
+            )
             if is_wall:
-                self.board[(x, y)] = ClueCell(x, y, row_sum, col_sum, is_wall)
+                self.grid[x][y] = ClueCell(x, y, row_sum, col_sum, is_wall)
+        self._clues = [cell for column in self.grid for cell in column if cell]
+        self.blank_cells: list[Cell] = [
+            (x, y)
+            for x, column in enumerate(self.grid)
+            for y, cell in enumerate(column)
+            if cell is None
+        ]
+        self.runs = self._find_runs()
 
     @property
-    def clues(self):
-        return self.board.values()
+    def clues(self) -> list[ClueCell]:
+        return self._clues
 
     def is_wall(self, col: int, row: int) -> bool:
-        cell = self.board.get((col, row))
-        return cell and cell.is_wall
+        # Only wall cells are stored in the grid
+        return self.grid[col][row] is not None
 
     def get_clue(self, col: int, row: int) -> ClueCell | None:
-        return self.board.get((col, row))
+        return self.grid[col][row]
+
+    def get_sum_run(self, first_x: int, first_y: int, direction: str) -> list[Cell]:
+        """Get cells involved in a sum run starting from a clue cell"""
+        if direction == "right":
+            return self._run_right(first_x, first_y)
+        return self._run_down(first_x, first_y)
+
+    def _run_right(self, first_x: int, first_y: int) -> list[Cell]:
+        # Index the grid directly, only wall cells are stored in it
+        grid = self.grid
+        cells = []
+        for x in range(first_x + 1, self.size[1]):
+            if grid[x][first_y] is not None:
+                break
+            cells.append((x, first_y))
+        return cells
+
+    def _run_down(self, first_x: int, first_y: int) -> list[Cell]:
+        column = self.grid[first_x]
+        cells = []
+        for y in range(first_y + 1, self.size[0]):
+            if column[y] is not None:
+                break
+            cells.append((first_x, y))
+        return cells
+
+    def _find_runs(self) -> list[SumRun]:
+        """Collect the non-empty sum runs of all clues once at load time"""
+        runs = []
+        for clue in self._clues:
+            if clue.row_sum is not None:
+                if cells := self._run_right(clue.x, clue.y):
+                    runs.append(SumRun(clue.row_sum, cells))
+            if clue.col_sum is not None:
+                if cells := self._run_down(clue.x, clue.y):
+                    runs.append(SumRun(clue.col_sum, cells))
+        return runs
@@ -1,101 +1,145 @@
 import argparse
+import itertools
 import os
 import random
 import re
+import threading
 import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
+import lxml.html
 import requests
-from bs4 import BeautifulSoup, Tag
-from common import PUZZLE_JSON_SCHEMA, pretty_json_str
-from jsonschema import validate
+import urllib3
+from lxml import etree
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from common import pretty_json_str
 
 SOURCE = "kakuroconquest"
+BASE_URL = f"https://www.{SOURCE}.com"
+SIZES = ["4x4", "6x6", "8x8", "9x11", "9x17"]
+DIFFICULTIES = ["easy", "intermediate", "hard", "challenging", "expert"]
+PUZZLE_ID_PATTERN = re.compile(r"puzzle (\d+)")
+MAX_WORKERS = 4
 
 
-def get_puzzle_page(size: str, difficulty: str) -> str:
-    """Get puzzle page HTML with rate limiting."""
-    base_url = f"https://www.{SOURCE}.com"
-    url = f"{base_url}/{size}/{difficulty}"
+def _has_class(name: str) -> str:
+    """XPath predicate matching elements whose class list contains name."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Compiled once so the per-cell lookups run entirely inside libxml2
+# Rows are direct children of the table, possibly wrapped in <tbody>
+ROWS_XPATH = etree.XPath("./tr | ./tbody/tr")
+CELLS_XPATH = etree.XPath(f"./td[not({_has_class('spacer')})]")
+RIGHT_SUM_XPATH = etree.XPath(f"string(.//div[{_has_class('topNumberHelp')}])")
+DOWN_SUM_XPATH = etree.XPath(f"string(.//div[{_has_class('bottomNumberHelp')}])")
+HAS_INPUT_XPATH = etree.XPath("boolean(.//input)")
+PUZZLE_ID_TEXT_XPATH = etree.XPath("//text()[contains(., 'puzzle ')]")
+
+
+def create_session() -> requests.Session:
+    """Create a session that reuses connections and retries transient errors."""
+    session = requests.Session()
+    retries = Retry(
+        total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504]
+    )
+    # One pooled connection per worker so concurrent scrapes don't reconnect
+    adapter = HTTPAdapter(
+        pool_connections=1, pool_maxsize=MAX_WORKERS, max_retries=retries
+    )
+    session.mount("https://", adapter)
+    return session
+
+
+# Reuse TCP/TLS connections across all puzzle requests
+SESSION = create_session()
+# Serializes the random delay so concurrent workers still space out requests
+_rate_limit_lock = threading.Lock()
+# Puzzles seen in this run, the site may serve the same random puzzle twice
+_scraped_puzzles: set[tuple[str, str, int]] = set()
+_scraped_puzzles_lock = threading.Lock()
+
+
+def get_puzzle_page(size: str, difficulty: str) -> lxml.html.HtmlElement:
+    """Get parsed puzzle page with rate limiting."""
+    url = f"{BASE_URL}/{size}/{difficulty}"
 
     # Respect rate limits with random delay
-    time.sleep(random.uniform(0.1, 0.2))
+    with _rate_limit_lock:
+        time.sleep(random.uniform(0.1, 0.2))
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        return response.text
+        with SESSION.get(url, timeout=10, stream=True) as response:
+            response.raise_for_status()
+            # Feed the gzip-decoded body straight into lxml, skipping response.text
+            response.raw.decode_content = True
+            root = lxml.html.parse(response.raw).getroot()
     except requests.Timeout:
         raise ValueError(f"Request timed out for {url}")
-    except requests.RequestException as e:
+    except (requests.RequestException, urllib3.exceptions.HTTPError) as e:
         raise ValueError(f"Failed to fetch {url}: {e}")
+    if root is None:
+        raise ValueError(f"Empty page returned for {url}")
+    return root
 
 
-def extract_puzzle_id(html: str) -> int | None:
-    """Extract puzzle ID from the page HTML."""
-    match = re.search(r"puzzle (\d+)", html)
-    if match:
-        return int(match.group(1))
+def extract_puzzle_id(root: lxml.html.HtmlElement) -> int | None:
+    """Extract puzzle ID from the parsed page."""
+    # Only run the regex over the few text nodes that mention a puzzle
+    for text in PUZZLE_ID_TEXT_XPATH(root):
+        if match := PUZZLE_ID_PATTERN.search(text):
+            return int(match.group(1))
     return None
 
 
-def parse_puzzle(html: str) -> dict:
-    """Parse puzzle HTML into JSON format."""
-    soup = BeautifulSoup(html, "html.parser")
-    table = soup.find("table")
-    if not table or not isinstance(table, Tag):
+def parse_puzzle(root: lxml.html.HtmlElement) -> dict:
+    """Parse puzzle page into JSON format."""
+    table = root.find(".//table")
+    if table is None:
         raise ValueError("No puzzle table found")
 
     # Get puzzle size from table dimensions
-    rows = list(table.find_all("tr"))
+    rows = ROWS_XPATH(table)
     if not rows:
         raise ValueError("No rows found in puzzle")
 
     # Get all non-spacer cells from first row to determine width
-    first_row_cells = []
-    first_row = rows[0]
-    if isinstance(first_row, Tag):
-        first_row_cells = [
-            td for td in first_row.find_all("td") if not td.get("class") == "spacer"
-        ]
-
+    first_row_cells = CELLS_XPATH(rows[0])
     if not first_row_cells:
         raise ValueError("No valid cells found in first row")
 
     size = [len(rows), len(first_row_cells)]
 
-    # Parse cells
-    cells = []
-    for y, row in enumerate(rows):
-        for x, cell in enumerate(row.find_all("td")):
-            # Skip spacer cells
-            if cell.get("class") == "spacer":
-                continue
-
-            cell_data = parse_cell(cell, x, y)
-            if cell_data:
-                cells.append(cell_data)
+    # Parse cells, skipping blank cells
+    cells = [
+        cell_data
+        for y, row in enumerate(rows)
+        for x, cell in enumerate(CELLS_XPATH(row))
+        if (cell_data := parse_cell(cell, x, y))
+    ]
 
     return {"size": size, "cells": cells}
 
 
-def parse_cell(cell: BeautifulSoup, x: int, y: int) -> dict | None:
+def parse_cell(cell: lxml.html.HtmlElement, x: int, y: int) -> dict | None:
     """Parse individual cell into JSON format."""
     cell_data = {"x": x, "y": y}
 
     # Find sum values in divs
-    right_divs = cell.find_all("div", class_="topNumberHelp")
-    down_divs = cell.find_all("div", class_="bottomNumberHelp")
-    if not right_divs and not down_divs:
-        if cell.find("input"):
+    right_sum = RIGHT_SUM_XPATH(cell).strip()
+    down_sum = DOWN_SUM_XPATH(cell).strip()
+    if not right_sum and not down_sum:
+        if HAS_INPUT_XPATH(cell):
             return None
         else:
             cell_data["wall"] = True
             return cell_data
 
-    if right_divs:
-        cell_data["right"] = int(right_divs[0].text.strip())
-    if down_divs:
-        cell_data["down"] = int(down_divs[0].text.strip())
+    if right_sum:
+        cell_data["right"] = int(right_sum)
+    if down_sum:
+        cell_data["down"] = int(down_sum)
     return cell_data
 
 
@@ -111,17 +155,36 @@ def save_puzzle(puzzle: dict, size: str, difficulty: str, puzzle_id: int):
     print(f"Saved puzzle to {filename}")
 
 
+def scrape_puzzle(size: str, difficulty: str) -> None:
+    """Fetch, parse and save a single puzzle."""
+    print(f"Scraping {size} {difficulty} puzzle...")
+    # The page is parsed once and shared by the id lookup and the cell walk
+    root = get_puzzle_page(size, difficulty)
+    puzzle_id = extract_puzzle_id(root)
+    if puzzle_id is not None:
+        key = (size, difficulty, puzzle_id)
+        with _scraped_puzzles_lock:
+            if key in _scraped_puzzles:
+                print(f"Skipping duplicate {size} {difficulty} puzzle {puzzle_id}")
+                return
+            _scraped_puzzles.add(key)
+
+    puzzle = parse_puzzle(root)
+    save_puzzle(puzzle, size, difficulty, puzzle_id)
+    print(f"✓ Scraped {size} {difficulty} puzzle {puzzle_id}")
+
+
 def main():
     """Main function to scrape puzzles."""
     parser = argparse.ArgumentParser(description="Kakuro Puzzle Scraper")
     parser.add_argument(
         "--size",
-        choices=["4x4", "6x6", "8x8", "9x11", "9x17"],
+        choices=SIZES,
         help="Puzzle size to scrape",
     )
     parser.add_argument(
         "--difficulty",
-        choices=["easy", "intermediate", "hard", "challenging", "expert"],
+        choices=DIFFICULTIES,
         help="Difficulty level to scrape",
     )
     parser.add_argument(
@@ -140,36 +203,26 @@ def main():
     if not (args.all or args.size or args.difficulty):
         parser.error("Must specify either --all, --size or --difficulty")
 
-    sizes = [args.size] if args.size else ["4x4", "6x6", "8x8", "9x11", "9x17"]
-    difficulties = (
-        [args.difficulty]
-        if args.difficulty
-        else ["easy", "intermediate", "hard", "challenging", "expert"]
-    )
+    sizes = [args.size] if args.size else SIZES
+    difficulties = [args.difficulty] if args.difficulty else DIFFICULTIES
+    tasks = itertools.product(sizes, difficulties, range(args.count))
 
     failed_counter = 0
-    for size in sizes:
-        for difficulty in difficulties:
-            for _ in range(args.count):
-                try:
-                    print(f"Scraping {size} {difficulty} puzzle...")
-                    html = get_puzzle_page(size, difficulty)
-                    puzzle_id = extract_puzzle_id(html)
-
-                    puzzle = parse_puzzle(html)
-                    validate(puzzle, PUZZLE_JSON_SCHEMA)
-                    save_puzzle(puzzle, size, difficulty, puzzle_id)
-                    print(f"✓ Scraped {size} {difficulty} puzzle {puzzle_id}")
-                except Exception as e:
-                    failed_counter += 1
-                    print(f"✗ Error scraping puzzle: {e}, {traceback.print_exc()}")
-                    if failed_counter > 3:
-                        print("Too many failures, exiting")
-                        return
-                    continue
-
-                # Additional delay between puzzles
-                time.sleep(random.uniform(0.1, 0.2))
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = [
+            executor.submit(scrape_puzzle, size, difficulty)
+            for size, difficulty, _ in tasks
+        ]
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                failed_counter += 1
+                print(f"✗ Error scraping puzzle: {e}, {traceback.print_exc()}")
+                if failed_counter > 3:
+                    print("Too many failures, exiting")
+                    executor.shutdown(cancel_futures=True)
+                    return
 
 
 if __name__ == "__main__":
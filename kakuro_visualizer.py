@@ -1,4 +1,3 @@
-import json
 import argparse
 from pathlib import Path
 from common import KakuroPuzzle, SolutionCell, Solution, load_puzzle_data
@@ -22,38 +21,46 @@ def create_svg(puzzle: KakuroPuzzle, solution: Solution) -> str:
         "</style>",
     ]
 
-    # Draw cells
-    for col in range(cols):
-        for row in range(rows):
-            x = col * cell_size
+    append = svg_lines.append
+    # Offsets inside a cell, solution digits are centered (float like before)
+    half = cell_size / 2
+    row_sum_dx = cell_size - 20
+    col_sum_dy = cell_size - 10
+
+    # Draw cells in one walk over the grid, which holds a clue or None per cell
+    for col, column in enumerate(puzzle.grid):
+        x = col * cell_size
+        x_end = x + cell_size
+        row_sum_x = x + row_sum_dx
+        col_sum_x = x + 10
+        for row, clue in enumerate(column):
             y = row * cell_size
 
-            if clue := puzzle.get_clue(col, row):
-                svg_lines.append(
-                    f'<rect x="{x}" y="{y}" width="{cell_size}" height="{cell_size}" class="wall"/>'
-                )
-                svg_lines.append(
-                    f'<line x1="{x}" y1="{y}" x2="{x+cell_size}" y2="{y+cell_size}" class="grid-line"/>'
+            if clue:
+                append(
+                    f'<rect x="{x}" y="{y}" width="{cell_size}" height="{cell_size}" class="wall"/>\n'
+                    f'<line x1="{x}" y1="{y}" x2="{x_end}" y2="{y+cell_size}" class="grid-line"/>'
                 )
 
                 if row_sum := clue.row_sum:
-                    svg_lines.append(
-                        f'<text x="{x+cell_size-20}" y="{y+20}" class="clue-text">{row_sum}</text>'
+                    append(
+                        f'<text x="{row_sum_x}" y="{y+20}" class="clue-text">{row_sum}</text>'
                     )
                 if col_sum := clue.col_sum:
-                    svg_lines.append(
-                        f'<text x="{x+10}" y="{y+cell_size-10}" class="clue-text">{col_sum}</text>'
+                    append(
+                        f'<text x="{col_sum_x}" y="{y+col_sum_dy}" class="clue-text">{col_sum}</text>'
                     )
             else:
-                svg_lines.append(
+                append(
                     f'<rect x="{x}" y="{y}" width="{cell_size}" height="{cell_size}" class="blank"/>'
                 )
 
-        if solution:
-            for cell in solution:
-                svg_lines.append(
-                    f'<text x="{cell.x * cell_size + cell_size/2}" y="{cell.y * cell_size + cell_size/2 + 5}" class="solution">{cell.value}</text>'
-                )
+    # Solution digits are drawn once, after all cells
+    if solution:
+        svg_lines.extend(
+            f'<text x="{cell.x * cell_size + half}" y="{cell.y * cell_size + half + 5}" class="solution">{cell.value}</text>'
+            for cell in solution
+        )
 
     svg_lines.append("</svg>")
     return "\n".join(svg_lines)